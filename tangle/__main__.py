@@ -1,6 +1,8 @@
+import sys
+
 from tangle.cli import Cli
 
 def main():
     cli = Cli()
 
-    cli.run()
+    sys.exit(cli.run())
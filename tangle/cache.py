@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple, cast
+import os
+import stat
+import struct
+import sys
+import threading
+
+from tangle.parser import AstNode, CodeBlockNode, DocumentNode, Parser, TextNode
+from tangle.profiling import mark_phase
+
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+NODE_HEADER_SIZE = 16
+
+POINTER_SIZE = struct.calcsize("P")
+
+ParserFactory = Callable[[str], Parser]
+
+
+_node_sizes: Dict[type, int] = {}
+
+
+def _node_size(node: AstNode) -> int:
+    # sys.getsizeof leaves out the garbage collector header of a node and the
+    # array holding its attribute values, which only depend on its class.
+    node_type = type(node)
+
+    if node_type not in _node_sizes:
+        attributes = [
+            name
+            for cls in node_type.__mro__
+            for name in cls.__dict__.get("__annotations__", {})
+        ]
+
+        _node_sizes[node_type] = (
+            sys.getsizeof(node) + NODE_HEADER_SIZE + POINTER_SIZE * len(attributes)
+        )
+
+    return _node_sizes[node_type]
+
+
+def _text_size(text: TextNode) -> int:
+    return _node_size(text) + sys.getsizeof(text.value)
+
+
+def document_size(document: DocumentNode) -> int:
+    # Approximates the memory held by a parsed document from its nodes and
+    # the strings they hold. Strings shared by every document, such as the
+    # operators, are not counted.
+    size = _node_size(document) + sys.getsizeof(document.links)
+
+    for i in range(document.count()):
+        code_block = cast(CodeBlockNode, document.get(i))
+        operator = code_block.operator
+
+        size += _node_size(code_block) + _node_size(operator)
+        size += _text_size(code_block.info) + _text_size(code_block.content)
+        size += _text_size(cast(TextNode, operator.operand))
+
+    for link in document.links:
+        size += _node_size(link) + _text_size(link.text) + _text_size(link.path)
+
+    return size + sys.getsizeof([None] * document.count())
+
+
+class CacheEntry:
+    fingerprint: Tuple[int, int, int]
+    document: DocumentNode
+    size: int
+
+    def __init__(
+        self, fingerprint: Tuple[int, int, int], document: DocumentNode, size: int
+    ):
+        self.fingerprint = fingerprint
+        self.document = document
+        self.size = size
+
+
+class DocumentCache:
+    hits: int
+    misses: int
+    evictions: int
+    _enabled: bool
+    _budget: int
+    _size: int
+    _entries: OrderedDict[Tuple[str, ParserFactory], CacheEntry]
+    _lock: threading.Lock
+
+    def __init__(self, budget: int = DEFAULT_BUDGET, enabled: bool = True):
+        if budget < 0:
+            raise ValueError("Budget cannot be negative")
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._enabled = enabled
+        self._budget = budget
+        self._size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def count(self) -> int:
+        return len(self._entries)
+
+    def set_budget(self, budget: int) -> None:
+        if budget < 0:
+            raise ValueError("Budget cannot be negative")
+
+        with self._lock:
+            self._budget = budget
+            self.__evict()
+
+    def enable(self) -> None:
+        self._enabled = True
+
+    def disable(self) -> None:
+        self._enabled = False
+
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __evict(self) -> None:
+        while self._entries and self._size > self._budget:
+            _, entry = self._entries.popitem(last=False)
+
+            self._size -= entry.size
+            self.evictions += 1
+
+    def __remove(self, key: Tuple[str, ParserFactory]) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry:
+            self._size -= entry.size
+
+    def load(
+        self,
+        path: str,
+        create_parser: ParserFactory,
+        path_stat: os.stat_result | None = None,
+    ) -> DocumentNode:
+        path = os.path.abspath(os.path.expanduser(path))
+        path_stat = path_stat or os.stat(path)
+        fingerprint = (path_stat.st_mtime_ns, path_stat.st_size, path_stat.st_ino)
+        key = (path, create_parser)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+                return entry.document
+
+            self.misses += 1
+
+        document = parse_file(path, create_parser)
+        size = document_size(document)
+
+        with self._lock:
+            self.__remove(key)
+
+            if size <= self._budget:
+                self._entries[key] = CacheEntry(fingerprint, document, size)
+                self._size += size
+
+                self.__evict()
+
+        return document
+
+
+def parse_file(path: str, create_parser: ParserFactory) -> DocumentNode:
+    with open(path, "r") as f:
+        parser = create_parser(f.read())
+
+    mark_phase("read", path)
+
+    document = parser.parse()
+
+    mark_phase("parse", path)
+
+    return document
+
+
+def load_document(
+    path: str, create_parser: ParserFactory, cache: DocumentCache | None = None
+) -> DocumentNode | None:
+    # A single stat both rejects anything but regular files and validates
+    # the cached entry, if any. A disabled cache is bypassed so that nothing
+    # keeps the document alive once it has been evaluated.
+    try:
+        path_stat = os.stat(os.path.expanduser(path))
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    if not stat.S_ISREG(path_stat.st_mode):
+        return None
+
+    if cache and cache.enabled:
+        return cache.load(path, create_parser, path_stat)
+
+    return parse_file(os.path.expanduser(path), create_parser)
+
+
+# One-shot runs read every document once, so the process cache is only
+# enabled by programs that tangle overlapping documents repeatedly.
+_document_cache = DocumentCache(enabled=False)
+
+
+def document_cache() -> DocumentCache:
+    return _document_cache
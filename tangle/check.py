@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Dict, List, Tuple
+import hashlib
+import locale
+import os
+import stat
+
+from tangle.template import Template
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class TargetStatus(Enum):
+    UP_TO_DATE = "up to date"
+    DRIFTED = "drifted"
+    MISSING = "missing"
+
+
+def expected_targets(template: Template) -> Dict[str, bytes]:
+    # Blocks are written in document order, so the last block writing a
+    # target determines its content.
+    encoding = locale.getpreferredencoding(False)
+    targets: Dict[str, bytes] = {}
+
+    for command in template.commands():
+        path = os.path.abspath(command.file_path.expanded())
+
+        targets[path] = command.content.encode(encoding)
+
+    return targets
+
+
+def file_digest(path: str) -> bytes:
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.digest()
+
+
+def check_target(path: str, expected: bytes) -> TargetStatus:
+    try:
+        target_stat = os.stat(path)
+    except FileNotFoundError:
+        return TargetStatus.MISSING
+
+    if not stat.S_ISREG(target_stat.st_mode):
+        return TargetStatus.MISSING
+
+    if target_stat.st_size != len(expected):
+        return TargetStatus.DRIFTED
+
+    if file_digest(path) != hashlib.sha256(expected).digest():
+        return TargetStatus.DRIFTED
+
+    return TargetStatus.UP_TO_DATE
+
+
+def check_template(template: Template, jobs: int = 1) -> List[Tuple[str, TargetStatus]]:
+    targets = expected_targets(template)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        statuses = executor.map(check_target, targets.keys(), targets.values())
+
+        return [
+            (path, status)
+            for path, status in zip(targets.keys(), statuses)
+            if status != TargetStatus.UP_TO_DATE
+        ]
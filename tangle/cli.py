@@ -1,17 +1,100 @@
 import argparse
+import os
+import sys
 
-from tangle.tangle import FileInterpreter
+from tangle.check import check_template
+from tangle.parser import COMPILED_EXTENSION, compile_document
+from tangle.profiling import profile_cpu, snapshot_phase, trace_memory
+from tangle.shard import ShardPlan, parse_shard
+from tangle.tangle import FORMATS, FileInterpreter, write_to_file
+from tangle.template import Template, compile_template, load_profiles, render_profiles
+
+
+def shard_argument(value: str):
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def compiled_path(path: str) -> str:
+    return os.path.splitext(path)[0] + COMPILED_EXTENSION
+
+
+def file_format(path: str) -> str:
+    if path.endswith(COMPILED_EXTENSION):
+        return "compiled"
+
+    return "plaintext"
 
 
 def create_args_parser():
     parser = argparse.ArgumentParser(
         prog="tangle",
         description="Copies markdown code blocks with the correct header syntax to target files.",
-        usage="%(prog)s [options] <file>",
+        usage="%(prog)s [options] [compile] <file>",
     )
 
     parser.add_argument("--version", action="version", version="%(prog)s 1.0.0")
-    parser.add_argument("file", type=str, help="a markdown file")
+
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        "--profiles",
+        type=str,
+        help="a JSON file of variable sets, the document is rendered once per set",
+    )
+    modes.add_argument(
+        "--shard",
+        type=shard_argument,
+        metavar="K/N",
+        help="tangle only the linked documents assigned to shard K of N",
+    )
+    modes.add_argument(
+        "--check",
+        action="store_true",
+        help="report targets that differ from the document without writing them",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS.keys(),
+        help="the format of the file (default: compiled for {} files, "
+        "plaintext otherwise)".format(COMPILED_EXTENSION),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="number of parallel workers, profiles are rendered one at a time and "
+        "targets are checked on every CPU by default",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="FILE",
+        help="write a CPU profile of the run to FILE, as collapsed stacks when "
+        "FILE ends with .folded or .collapsed and as pstats otherwise",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        type=str,
+        metavar="FILE",
+        help="write the traced memory after every document is read, parsed and "
+        "evaluated, and tracemalloc snapshots of the run phases, to FILE",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="the document written by compile, relative paths of the markdown "
+        "file are resolved from its directory (default: the file with a {} "
+        "extension)".format(COMPILED_EXTENSION),
+    )
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["compile"],
+        help="compile the markdown file into a document that loads without parsing",
+    )
+    parser.add_argument("file", type=str, help="a markdown or compiled file")
 
     return parser
 
@@ -20,15 +103,103 @@ class Cli:
     _args: argparse.Namespace
 
     def _eval_file(self) -> None:
-        interpreter = FileInterpreter(self._args.file)
+        interpreter = FileInterpreter(self._args.file, self._format())
 
         interpreter.eval()
 
+    def _render_profiles(self) -> None:
+        template = self._compile_template()
+        profiles = load_profiles(self._args.profiles)
+
+        render_profiles(template, profiles, self._args.jobs or 1)
+
+    def _tangle_shard(self) -> int:
+        index, count = self._args.shard
+        plan = ShardPlan(self._compile_template(), count)
+        conflicts = plan.conflicts()
+
+        for target, shards in sorted(conflicts.items()):
+            print(
+                "{} is written by shards {}".format(
+                    target, ", ".join(str(shard) for shard in sorted(shards))
+                ),
+                file=sys.stderr,
+            )
+
+        if conflicts:
+            return 1
+
+        plan.template(index).render()
+
+        return 0
+
+    def _check(self) -> int:
+        template = self._compile_template()
+        jobs = self._args.jobs or os.cpu_count() or 1
+        drifts = check_template(template, jobs)
+
+        for path, status in sorted(drifts):
+            print("{}: {}".format(status.value, path), file=sys.stderr)
+
+        return 1 if drifts else 0
+
+    def _compile(self) -> int:
+        output = self._args.output or compiled_path(self._args.file)
+        source_path = os.path.relpath(
+            os.path.abspath(os.path.expanduser(self._args.file)),
+            os.path.dirname(os.path.abspath(os.path.expanduser(output))),
+        )
+
+        with open(os.path.expanduser(self._args.file), "r") as f:
+            write_to_file(compile_document(f.read(), source_path), output)
+
+        return 0
+
+    def _compile_template(self) -> Template:
+        template = compile_template(self._args.file, self._format())
+
+        snapshot_phase("parse")
+
+        return template
+
+    def _format(self) -> str:
+        return self._args.format or file_format(self._args.file)
+
     def _parse_args(self) -> None:
         args_parser = create_args_parser()
 
-        self._args = args_parser.parse_args()
+        # Options may follow the command, so positionals are matched only once
+        # every option has been consumed.
+        self._args = args_parser.parse_intermixed_args()
+
+        if self._args.command == "compile":
+            if self._args.profiles or self._args.shard or self._args.check:
+                args_parser.error("compile cannot be combined with another mode")
+        elif self._args.output:
+            args_parser.error("argument -o/--output: only allowed with compile")
 
-    def run(self) -> None:
+    def _run(self) -> int:
+        if self._args.profiles:
+            self._render_profiles()
+        elif self._args.shard:
+            return self._tangle_shard()
+        elif self._args.check:
+            return self._check()
+        else:
+            self._eval_file()
+
+        return 0
+
+    def run(self) -> int:
         self._parse_args()
-        self._eval_file()
+
+        with trace_memory(self._args.trace_memory):
+            with profile_cpu(self._args.profile):
+                if self._args.command == "compile":
+                    status = self._compile()
+                else:
+                    status = self._run()
+
+            snapshot_phase(self._args.command or "evaluate")
+
+        return status
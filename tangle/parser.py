@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 from enum import Enum, auto
-from typing import List, Tuple
+from typing import Dict, List, Tuple, cast
 import abc
+import hashlib
+import json
 import re
 
 OPERATORS = [">"]
 
+DOCUMENT_EXTENSION = ".md"
+
+URL_SCHEME_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+
+COMPILED_VERSION = 1
+
+COMPILED_EXTENSION = ".tangle"
+
 
 def is_operator(s: str) -> bool:
     return s in OPERATORS
@@ -29,6 +39,23 @@ def split_code_block_header_components(
     return None, None, None
 
 
+def document_link_path(target: str) -> str | None:
+    # Classifies a link target without touching the file system: URLs,
+    # anchors and links to anything but markdown documents are dropped.
+    if not target or target.startswith("#"):
+        return None
+
+    if URL_SCHEME_PATTERN.match(target):
+        return None
+
+    path = target.split("#", 1)[0].split("?", 1)[0]
+
+    if not path.endswith(DOCUMENT_EXTENSION):
+        return None
+
+    return path
+
+
 class AstNodeType(Enum):
     DOCUMENT = auto()
     CODE_BLOCK = auto()
@@ -144,7 +171,7 @@ class StringParser(Parser):
             "(```.*?\n[.*?\n]?```$)", flags=re.DOTALL | re.MULTILINE
         )
         self._link_pattern = re.compile(
-            r"\[([^\]]+)\]\(([^\)]+)\)", flags=re.DOTALL | re.MULTILINE
+            r"(!?)\[([^\]]+)\]\(([^\)]+)\)", flags=re.DOTALL | re.MULTILINE
         )
 
     def __parse_code_block(self, source: str) -> CodeBlockNode | None:
@@ -165,7 +192,15 @@ class StringParser(Parser):
         )
 
     def __parse_link(self, match: Tuple) -> LinkNode | None:
-        name, path = match
+        image, name, target = match
+
+        if image:
+            return None
+
+        path = document_link_path(target.strip())
+
+        if not path:
+            return None
 
         return LinkNode(TextNode(name), TextNode(path))
 
@@ -193,6 +228,93 @@ class StringParser(Parser):
         return document
 
 
+def source_fingerprint(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def compile_document(source: str, source_path: str | None = None) -> str:
+    # A compiled document is a JSON header on the first line holding the block
+    # and link tables, followed by the contents of every block. Blocks refer to
+    # their content by offset and length, so loading needs no regex scanning.
+    # The source path, if any, is relative to the compiled document.
+    document = StringParser(source).parse()
+    blocks = []
+    contents = []
+    offset = 0
+
+    for i in range(document.count()):
+        code_block = cast(CodeBlockNode, document.get(i))
+        operand = cast(TextNode, code_block.operator.operand)
+        content = code_block.content.value
+
+        blocks.append(
+            [
+                code_block.info.value,
+                code_block.operator.operator,
+                operand.value,
+                offset,
+                len(content),
+            ]
+        )
+        contents.append(content)
+        offset += len(content)
+
+    header = {
+        "version": COMPILED_VERSION,
+        "source": source_path,
+        "fingerprint": source_fingerprint(source),
+        "blocks": blocks,
+        "links": [[link.text.value, link.path.value] for link in document.links],
+    }
+
+    return json.dumps(header) + "\n" + "".join(contents)
+
+
+def parse_compiled_header(header_source: str) -> Dict:
+    try:
+        header = json.loads(header_source)
+    except ValueError:
+        raise ValueError("Compiled document header is invalid")
+
+    if not isinstance(header, dict) or header.get("version") != COMPILED_VERSION:
+        raise ValueError("Compiled document version is not supported")
+
+    for table in ["blocks", "links"]:
+        if not isinstance(header.get(table), list):
+            raise ValueError("Compiled document header has no {} table".format(table))
+
+    return header
+
+
+class CompiledParser(Parser):
+    _source: str
+
+    def __init__(self, source: str):
+        self._source = source
+
+    def parse(self) -> DocumentNode:
+        header_source, _, contents = self._source.partition("\n")
+        header = parse_compiled_header(header_source)
+        document = DocumentNode()
+
+        try:
+            for info, operator, path, offset, length in header["blocks"]:
+                document.add(
+                    CodeBlockNode(
+                        TextNode(info),
+                        TextNode(contents[offset : offset + length]),
+                        UnaryOperatorNode(operator, TextNode(path)),
+                    )
+                )
+
+            for text, path in header["links"]:
+                document.links.append(LinkNode(TextNode(text), TextNode(path)))
+        except (TypeError, ValueError):
+            raise ValueError("Compiled document tables are invalid")
+
+        return document
+
+
 class Visitor(abc.ABC):
     @abc.abstractmethod
     def visit_document(self, document: DocumentNode) -> None:
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Set, Tuple
+import cProfile
+import os
+import pstats
+import tracemalloc
+
+COLLAPSED_EXTENSIONS = [".folded", ".collapsed"]
+
+Function = Tuple[str, int, str]
+
+
+class MemoryTracer:
+    _output_path: str
+    _limit: int
+    _report: List[str]
+    _previous: tracemalloc.Snapshot | None
+
+    def __init__(self, output_path: str, limit: int = 10):
+        self._output_path = output_path
+        self._limit = limit
+        self._report = []
+        self._previous = None
+
+    def __take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+
+    def start(self) -> None:
+        tracemalloc.start()
+
+        self._previous = self.__take_snapshot()
+
+    def record(self, phase: str, path: str | None = None) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        title = "after {}".format(phase)
+
+        if path:
+            title += " ({})".format(path)
+
+        self._report.append("{}: current={} peak={}".format(title, current, peak))
+
+    def snapshot(self, phase: str) -> None:
+        # Snapshots are costly on large heaps, so they are only taken at the
+        # boundaries of the run while documents only record the counters.
+        snapshot = self.__take_snapshot()
+
+        self.record(phase)
+
+        if self._previous:
+            stats = snapshot.compare_to(self._previous, "lineno")
+
+            for stat in stats[: self._limit]:
+                self._report.append("  {}".format(stat))
+
+        self._previous = snapshot
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+
+        self._previous = None
+
+        with open(os.path.expanduser(self._output_path), "w+") as f:
+            f.write("\n".join(self._report) + "\n")
+
+
+_memory_tracer: MemoryTracer | None = None
+
+_cpu_profiler: cProfile.Profile | None = None
+
+
+def mark_phase(phase: str, path: str | None = None) -> None:
+    if _memory_tracer:
+        _memory_tracer.record(phase, path)
+
+
+def snapshot_phase(phase: str) -> None:
+    if not _memory_tracer:
+        return
+
+    # The CPU profile is paused so that it does not include the snapshots.
+    if _cpu_profiler:
+        _cpu_profiler.disable()
+
+    try:
+        _memory_tracer.snapshot(phase)
+    finally:
+        if _cpu_profiler:
+            _cpu_profiler.enable()
+
+
+@contextmanager
+def trace_memory(output_path: str | None) -> Iterator[None]:
+    global _memory_tracer
+
+    if not output_path:
+        yield
+        return
+
+    _memory_tracer = MemoryTracer(output_path)
+    _memory_tracer.start()
+
+    try:
+        yield
+    finally:
+        _memory_tracer.stop()
+        _memory_tracer = None
+
+
+def _frame_name(function: Function) -> str:
+    filename, lineno, name = function
+
+    if filename == "~":
+        return name
+
+    return "{}:{}:{}".format(os.path.basename(filename), lineno, name)
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    # cProfile only records caller/callee pairs, so the time of a function is
+    # split between its callers in proportion to the time spent through each.
+    entries = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[Function, List[Tuple[Function, float]]] = {}
+    stacks: Dict[str, int] = {}
+
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, _, edge_time) in callers.items():
+            callees.setdefault(caller, []).append((function, edge_time))
+
+    def walk(function: Function, stack: List[str], path: Set[Function], scale: float):
+        _, _, total_time, _, _ = entries[function]
+
+        stack = stack + [_frame_name(function)]
+        key = ";".join(stack)
+        stacks[key] = stacks.get(key, 0) + int(total_time * scale * 1e6)
+
+        for callee, edge_time in callees.get(function, []):
+            cumulative_time = entries[callee][3]
+
+            if callee in path or cumulative_time <= 0:
+                continue
+
+            callee_scale = scale * edge_time / cumulative_time
+
+            if cumulative_time * callee_scale < 1e-6:
+                continue
+
+            walk(callee, stack, path | {callee}, callee_scale)
+
+    for function, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(function, [], {function}, 1.0)
+
+    return {stack: value for stack, value in stacks.items() if value > 0}
+
+
+def write_cpu_profile(profiler: cProfile.Profile, output_path: str) -> None:
+    output_path = os.path.expanduser(output_path)
+
+    if os.path.splitext(output_path)[1] not in COLLAPSED_EXTENSIONS:
+        profiler.dump_stats(output_path)
+        return
+
+    stacks = collapsed_stacks(pstats.Stats(profiler))
+
+    with open(output_path, "w+") as f:
+        for stack, value in stacks.items():
+            f.write("{} {}\n".format(stack, value))
+
+
+@contextmanager
+def profile_cpu(output_path: str | None) -> Iterator[None]:
+    global _cpu_profiler
+
+    if not output_path:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    _cpu_profiler = profiler
+    profiler.enable()
+
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _cpu_profiler = None
+
+        write_cpu_profile(profiler, output_path)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Dict, List, Set, Tuple
+import hashlib
+import os
+
+from tangle.tangle import FilePath
+from tangle.template import Template, TemplateDocument
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    components = value.split("/")
+
+    if len(components) != 2 or not all(c.isdigit() for c in components):
+        raise ValueError("Shard {} must be formatted as K/N".format(value))
+
+    index, count = int(components[0]), int(components[1])
+
+    if count < 1 or index < 1 or index > count:
+        raise ValueError("Shard {} must satisfy 1 <= K <= N".format(value))
+
+    return index, count
+
+
+def document_key(root_path: FilePath, path: FilePath) -> str:
+    # Documents are keyed relative to the root document so that every runner
+    # agrees on the assignment wherever the tree is checked out.
+    relative_path = os.path.relpath(path.expanded(), root_path.dirname() or ".")
+
+    return relative_path.replace(os.sep, "/")
+
+
+def shard_of(key: str, count: int) -> int:
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+class ShardPlan:
+    _template: Template
+    _shards: List[int]
+
+    def __init__(self, template: Template, count: int):
+        self._template = template
+
+        self._shards = [
+            shard_of(document_key(template.documents[0].path, document.path), count)
+            for document in template.documents
+        ]
+
+    def documents(self, index: int) -> List[TemplateDocument]:
+        return [
+            document
+            for document, shard in zip(self._template.documents, self._shards)
+            if shard == index
+        ]
+
+    def template(self, index: int) -> Template:
+        return Template(self.documents(index))
+
+    def conflicts(self) -> Dict[str, Set[int]]:
+        targets: Dict[str, Set[int]] = {}
+
+        for document, shard in zip(self._template.documents, self._shards):
+            for block in document.blocks:
+                target = block.command().file_path.expanded()
+
+                targets.setdefault(os.path.abspath(target), set()).add(shard)
+
+        return {target: shards for target, shards in targets.items() if len(shards) > 1}
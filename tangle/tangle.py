@@ -2,28 +2,73 @@ from __future__ import annotations
 
 import abc
 import os
-from typing import cast
+from collections import deque
+from typing import Callable, Deque, Set, Tuple, cast
 
+from tangle.cache import document_cache, load_document
 from tangle.parser import (
     DocumentNode,
     CodeBlockNode,
+    CompiledParser,
     Parser,
     StringParser,
     TextNode,
     Visitor,
+    parse_compiled_header,
+    source_fingerprint,
 )
+from tangle.profiling import mark_phase
+
+FORMATS = {"plaintext": StringParser, "compiled": CompiledParser}
 
 
 def write_to_file(content: str, file_path: str) -> None:
     fpath = FilePath(file_path)
 
     if not fpath.file_or_dir_exists():
-        os.makedirs(fpath.dirname())
+        try:
+            os.makedirs(fpath.dirname())
+        except FileExistsError:
+            pass
 
     with open(fpath.expanded(), "w+") as f:
         f.write(content)
 
 
+def resolve_path(root_path: FilePath, path: FilePath) -> FilePath:
+    if path.isabs():
+        return path
+
+    return FilePath(os.path.join(root_path.dirname(), path.expanded()))
+
+
+def compiled_root_path(path: FilePath) -> FilePath:
+    # Relative paths of a compiled document are resolved from its source, as
+    # they would be when tangling the source itself, wherever it was compiled
+    # to. The source is checked for changes since it was compiled.
+    with open(path.expanded(), "r") as f:
+        header = parse_compiled_header(f.readline())
+
+    if not header.get("source"):
+        return path
+
+    source_path = resolve_path(path, FilePath(header["source"]))
+
+    # The source may not be shipped along with the compiled document.
+    if not source_path.isfile():
+        return source_path
+
+    with open(source_path.expanded(), "r") as f:
+        fingerprint = source_fingerprint(f.read())
+
+    if fingerprint != header.get("fingerprint"):
+        raise ValueError(
+            "Compiled document {} is stale, compile {} again".format(path, source_path)
+        )
+
+    return source_path
+
+
 class Command(abc.ABC):
     @abc.abstractmethod
     def execute(self) -> None:
@@ -38,28 +83,31 @@ class CopyToFileCommand(Command):
         self._file_path = file_path
         self._content = content
 
+    @property
+    def file_path(self) -> FilePath:
+        return self._file_path
+
+    @property
+    def content(self) -> str:
+        return self._content
+
     def execute(self) -> None:
         write_to_file(self._content, self._file_path.expanded())
 
 
 class InterpretFileCommand(Command):
     file_path: FilePath
+    _scheduler: Scheduler
 
-    def __init__(self, file_path: FilePath):
+    def __init__(self, file_path: FilePath, scheduler: Scheduler):
         self.file_path = file_path
+        self._scheduler = scheduler
 
     def execute(self) -> None:
-        if not self.file_path.file_or_dir_exists():
+        if not self.file_path.is_markdown():
             return
 
-        if not self.file_path.isfile():
-            return
-
-        if not self.file_path.extension() == "md":
-            return
-
-        interpreter = FileInterpreter(self.file_path.expanded())
-        interpreter.eval()
+        self._scheduler.schedule(self.file_path)
 
 
 class FilePath:
@@ -95,6 +143,11 @@ class FilePath:
     def dirname(self) -> str:
         return os.path.dirname(self.expanded())
 
+    def is_markdown(self) -> bool:
+        # Only the extension is checked, the file itself is checked by the
+        # single stat made when it is loaded.
+        return self.extension() == "md"
+
     def extension(self) -> str:
         components = self._path.split(".")
 
@@ -117,19 +170,30 @@ class FilePath:
 
 
 class EvalVisitor(Visitor):
-    def __init__(self, root_path: FilePath):
+    _root_path: FilePath
+    _scheduler: Scheduler | None
+
+    def __init__(self, root_path: FilePath, scheduler: Scheduler | None = None):
         self._root_path = root_path
+        self._scheduler = scheduler
 
     def visit_document(self, document: DocumentNode) -> None:
         for i in range(document.count()):
             document.get(i).accept(self)
 
+        # Linked documents are queued rather than interpreted recursively. A
+        # visitor created without a scheduler drains its own queue.
+        scheduler = self._scheduler or Scheduler(EvalVisitor)
+
         for link in document.links:
             file_path = self._file_path(FilePath(link.path.value))
 
-            command = InterpretFileCommand(file_path)
+            command = InterpretFileCommand(file_path, scheduler)
             command.execute()
 
+        if not self._scheduler:
+            scheduler.run()
+
     def visit_code_block(self, code_block: CodeBlockNode) -> None:
         operator = code_block.operator
 
@@ -148,10 +212,7 @@ class EvalVisitor(Visitor):
         pass
 
     def _file_path(self, path: FilePath) -> FilePath:
-        if path.isabs():
-            return path
-
-        return FilePath(os.path.join(self._root_path.dirname(), path.expanded()))
+        return resolve_path(self._root_path, path)
 
 
 class Interpreter(abc.ABC):
@@ -185,28 +246,83 @@ class BaseInterpreter(Interpreter):
         self.__clear()
 
 
+VisitorFactory = Callable[[FilePath, "Scheduler"], Visitor]
+
+ParserFactory = Callable[[str], Parser]
+
+
+class Scheduler:
+    _create_visitor: VisitorFactory
+    _queue: Deque[Tuple[FilePath, ParserFactory, bool, FilePath]]
+    _visited: Set[str]
+
+    def __init__(self, create_visitor: VisitorFactory):
+        self._create_visitor = create_visitor
+        self._queue = deque()
+        self._visited = set()
+
+    def schedule(
+        self,
+        path: FilePath,
+        create_parser: ParserFactory = StringParser,
+        required: bool = False,
+        root_path: FilePath | None = None,
+    ) -> None:
+        key = os.path.abspath(path.expanded())
+
+        if key in self._visited:
+            return
+
+        self._visited.add(key)
+        self._queue.append((path, create_parser, required, root_path or path))
+
+    def __evaluate(
+        self,
+        path: FilePath,
+        create_parser: ParserFactory,
+        required: bool,
+        root_path: FilePath,
+    ) -> None:
+        document = load_document(path.expanded(), create_parser, document_cache())
+
+        if document is None:
+            if required:
+                raise FileNotFoundError("File {} does not exist".format(path))
+
+            return
+
+        document.accept(self._create_visitor(root_path, self))
+
+        mark_phase("evaluate", path.path)
+
+    def run(self) -> None:
+        # Documents are interpreted breadth-first and the queue only holds
+        # paths. Each document is evaluated by its own call, so it is released
+        # before the next one is read, unless the process cache is enabled.
+        while self._queue:
+            self.__evaluate(*self._queue.popleft())
+
+
 class FileInterpreter(Interpreter):
     _path: FilePath
     _format: str
-    _parser: Parser
 
     def __init__(self, path: str, format="plaintext"):
-        if format not in ["plaintext"]:
+        if format not in FORMATS:
             raise ValueError("Format {} is not supported".format(format))
 
         self._path = FilePath(path)
         self._format = format
 
-    def __create_parser(self):
-        if self._format == "plaintext":
-            with open(self._path.expanded(), "r") as f:
-                self._parser = StringParser(f.read())
+    def eval(self) -> None:
+        root_path = self._path
 
-    def __evaluate(self) -> None:
-        base_interpreter = BaseInterpreter(self._parser, EvalVisitor(self._path))
+        if self._format == "compiled":
+            root_path = compiled_root_path(self._path)
 
-        base_interpreter.eval()
+        scheduler = Scheduler(EvalVisitor)
 
-    def eval(self) -> None:
-        self.__create_parser()
-        self.__evaluate()
+        scheduler.schedule(
+            self._path, FORMATS[self._format], required=True, root_path=root_path
+        )
+        scheduler.run()
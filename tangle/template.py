@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, cast
+import json
+import os
+import re
+
+from tangle.parser import (
+    CodeBlockNode,
+    DocumentNode,
+    TextNode,
+    Visitor,
+)
+from tangle.tangle import (
+    FORMATS,
+    CopyToFileCommand,
+    FilePath,
+    InterpretFileCommand,
+    Scheduler,
+    compiled_root_path,
+    resolve_path,
+)
+
+PLACEHOLDER_PATTERN = re.compile(r"\[\[([A-Z_][A-Z0-9_]*)\]\]")
+
+
+def load_profiles(path: str) -> Dict[str, Dict[str, str]]:
+    with open(os.path.expanduser(path), "r") as f:
+        profiles = json.load(f)
+
+    if not isinstance(profiles, dict):
+        raise ValueError("Profiles file {} must contain an object".format(path))
+
+    for name, variables in profiles.items():
+        if not isinstance(variables, dict):
+            raise ValueError("Profile {} must be an object".format(name))
+
+        for key, value in variables.items():
+            if not isinstance(value, str):
+                raise ValueError(
+                    "Variable {} of profile {} must be a string".format(key, name)
+                )
+
+    return profiles
+
+
+class TemplateString:
+    _source: str
+    _segments: List[str]
+
+    def __init__(self, source: str):
+        self._source = source
+        self._segments = PLACEHOLDER_PATTERN.split(source)
+
+    def render(self, variables: Dict[str, str] | None = None) -> str:
+        if variables is None or len(self._segments) == 1:
+            return self._source
+
+        segments = list(self._segments)
+
+        for i in range(1, len(segments), 2):
+            name = segments[i]
+
+            if name not in variables:
+                raise ValueError("Variable {} is not defined".format(name))
+
+            segments[i] = variables[name]
+
+        return "".join(segments)
+
+
+class TemplateBlock:
+    root_path: FilePath
+    target: TemplateString
+    content: TemplateString
+
+    def __init__(
+        self, root_path: FilePath, target: TemplateString, content: TemplateString
+    ):
+        self.root_path = root_path
+        self.target = target
+        self.content = content
+
+    def command(self, variables: Dict[str, str] | None = None) -> CopyToFileCommand:
+        file_path = resolve_path(
+            self.root_path, FilePath(self.target.render(variables))
+        )
+
+        return CopyToFileCommand(file_path, self.content.render(variables))
+
+
+class TemplateDocument:
+    path: FilePath
+    blocks: List[TemplateBlock]
+
+    def __init__(self, path: FilePath):
+        self.path = path
+        self.blocks = []
+
+
+class Template:
+    documents: List[TemplateDocument]
+
+    def __init__(self, documents: List[TemplateDocument] | None = None):
+        self.documents = documents or []
+
+    def commands(
+        self, variables: Dict[str, str] | None = None
+    ) -> List[CopyToFileCommand]:
+        return [
+            block.command(variables)
+            for document in self.documents
+            for block in document.blocks
+        ]
+
+    def render(self, variables: Dict[str, str] | None = None) -> None:
+        # Resolve every block before writing so that a missing variable
+        # leaves the profile untouched instead of half written.
+        for command in self.commands(variables):
+            command.execute()
+
+
+class CompileVisitor(Visitor):
+    _root_path: FilePath
+    _template: Template
+    _scheduler: Scheduler
+    _document: TemplateDocument
+
+    def __init__(self, root_path: FilePath, template: Template, scheduler: Scheduler):
+        self._root_path = root_path
+        self._template = template
+        self._scheduler = scheduler
+        self._document = TemplateDocument(root_path)
+
+    def visit_document(self, document: DocumentNode) -> None:
+        self._template.documents.append(self._document)
+
+        for i in range(document.count()):
+            document.get(i).accept(self)
+
+        for link in document.links:
+            file_path = resolve_path(self._root_path, FilePath(link.path.value))
+
+            command = InterpretFileCommand(file_path, self._scheduler)
+            command.execute()
+
+    def visit_code_block(self, code_block: CodeBlockNode) -> None:
+        operator = code_block.operator
+
+        if operator.operator == ">":
+            text_node = cast(TextNode, operator.operand)
+
+            self._document.blocks.append(
+                TemplateBlock(
+                    self._root_path,
+                    TemplateString(text_node.value),
+                    TemplateString(code_block.content.value),
+                )
+            )
+
+    def visit_unary_operator(self, _) -> None:
+        pass
+
+    def visit_text(self, _) -> None:
+        pass
+
+
+def compile_template(path: str, format="plaintext") -> Template:
+    if format not in FORMATS:
+        raise ValueError("Format {} is not supported".format(format))
+
+    root_path = FilePath(path)
+
+    if format == "compiled":
+        root_path = compiled_root_path(FilePath(path))
+
+    template = Template()
+    scheduler = Scheduler(
+        lambda document_path, scheduler: CompileVisitor(
+            document_path, template, scheduler
+        )
+    )
+
+    scheduler.schedule(
+        FilePath(path), FORMATS[format], required=True, root_path=root_path
+    )
+    scheduler.run()
+
+    return template
+
+
+def profile_template_commands(
+    template: Template, name: str, variables: Dict[str, str]
+) -> List[CopyToFileCommand]:
+    commands = []
+
+    for document in template.documents:
+        for block in document.blocks:
+            try:
+                commands.append(block.command(variables))
+            except ValueError as e:
+                raise ValueError(
+                    "Profile {} cannot render {}: {}".format(name, document.path, e)
+                )
+
+    return commands
+
+
+def profile_commands(
+    template: Template, profiles: Dict[str, Dict[str, str]]
+) -> List[List[CopyToFileCommand]]:
+    # Every profile is resolved before anything is written. A target rendered
+    # by several profiles is written once when their contents agree, and
+    # rejected otherwise since parallel writers would interleave.
+    targets: Dict[str, Tuple[str, str]] = {}
+    commands = []
+
+    for name, variables in profiles.items():
+        rendered = []
+
+        for command in profile_template_commands(template, name, variables):
+            target = os.path.abspath(command.file_path.expanded())
+            owner, content = targets.get(target, (name, command.content))
+
+            if owner != name:
+                if content != command.content:
+                    raise ValueError(
+                        "Target {} is rendered differently by profiles {} and {}".format(
+                            target, owner, name
+                        )
+                    )
+
+                continue
+
+            targets[target] = (name, command.content)
+            rendered.append(command)
+
+        commands.append(rendered)
+
+    return commands
+
+
+def execute_commands(commands: List[CopyToFileCommand]) -> None:
+    for command in commands:
+        command.execute()
+
+
+def render_profiles(
+    template: Template, profiles: Dict[str, Dict[str, str]], jobs: int = 1
+) -> None:
+    commands = profile_commands(template, profiles)
+
+    if jobs <= 1:
+        for rendered in commands:
+            execute_commands(rendered)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # Consume the results so that errors raised by a worker propagate.
+            list(executor.map(execute_commands, commands))
@@ -0,0 +1,123 @@
+import os
+import pytest
+import tempfile
+
+from test import write_file
+from tangle.cache import DocumentCache, document_size, load_document
+from tangle.parser import StringParser
+
+
+def create_block(name):
+    return "```ruby > ~/{}.rb\nputs '{}'\n```".format(name, name)
+
+
+class TestDocumentCache:
+    def test_init_raises_error_with_negative_budget(self):
+        with pytest.raises(ValueError):
+            DocumentCache(-1)
+
+    def test_load_hit(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "document.md")
+            cache = DocumentCache()
+
+            write_file(path, create_block("animal"))
+
+            document = cache.load(path, StringParser)
+
+            assert cache.load(path, StringParser) is document
+            assert document.count() == 1
+            assert cache.hits == 1
+            assert cache.misses == 1
+
+    def test_load_invalidates_modified_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "document.md")
+            cache = DocumentCache()
+
+            write_file(path, create_block("animal"))
+
+            cache.load(path, StringParser)
+
+            write_file(path, create_block("animal") + "\n" + create_block("dog"))
+
+            document = cache.load(path, StringParser)
+
+            assert document.count() == 2
+            assert cache.misses == 2
+            assert cache.count() == 1
+            assert cache.size == document_size(document)
+
+    def test_load_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            paths = [os.path.join(tmpdirname, "{}.md".format(i)) for i in range(3)]
+
+            for path in paths:
+                write_file(path, create_block("animal"))
+
+            size = document_size(StringParser(create_block("animal")).parse())
+            cache = DocumentCache(2 * size)
+
+            cache.load(paths[0], StringParser)
+            cache.load(paths[1], StringParser)
+            cache.load(paths[0], StringParser)
+            cache.load(paths[2], StringParser)
+
+            assert cache.evictions == 1
+            assert cache.count() == 2
+
+            cache.load(paths[0], StringParser)
+            cache.load(paths[1], StringParser)
+
+            assert cache.hits == 2
+            assert cache.misses == 4
+
+    def test_set_budget_evicts_entries(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "document.md")
+            cache = DocumentCache()
+
+            write_file(path, create_block("animal"))
+
+            cache.load(path, StringParser)
+            cache.set_budget(0)
+
+            assert cache.count() == 0
+            assert cache.size == 0
+            assert cache.evictions == 1
+
+    def test_load_document_bypasses_disabled_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "document.md")
+            cache = DocumentCache(enabled=False)
+
+            write_file(path, create_block("animal"))
+
+            document = load_document(path, StringParser, cache)
+
+            assert load_document(path, StringParser, cache) is not document
+            assert cache.count() == 0
+            assert cache.misses == 0
+
+            cache.enable()
+
+            assert load_document(path, StringParser, cache) is load_document(
+                path, StringParser, cache
+            )
+
+            cache.disable()
+
+            assert cache.count() == 0
+
+
+class TestDocumentSize:
+    def test_document_size_grows_with_content(self):
+        small = StringParser(create_block("animal")).parse()
+        large = StringParser(create_block("animal" * 1000)).parse()
+
+        assert 0 < document_size(small) < document_size(large)
+
+    def test_document_size_exceeds_source_size(self):
+        source = "\n".join(create_block("animal{}".format(i)) for i in range(100))
+
+        assert document_size(StringParser(source).parse()) > len(source)
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+from test import write_file
+from tangle.check import TargetStatus, check_target, check_template
+from tangle.template import compile_template
+
+
+def create_document(dir):
+    path = os.path.join(dir, "index.md")
+    blocks = [
+        "```ruby > {}\nputs {}\n```".format(name, i)
+        for i, name in enumerate(["a.rb", "b.rb", "c.rb", "d.rb"])
+    ]
+
+    write_file(path, "\n".join(blocks))
+
+    return path
+
+
+class TestCheckTarget:
+    def test_check_target(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "a.rb")
+
+            assert check_target(path, b"puts 0\n") == TargetStatus.MISSING
+            assert check_target(tmpdirname, b"puts 0\n") == TargetStatus.MISSING
+
+            write_file(path, "puts 0\n")
+
+            assert check_target(path, b"puts 0\n") == TargetStatus.UP_TO_DATE
+            assert check_target(path, b"puts 1\n") == TargetStatus.DRIFTED
+            assert check_target(path, b"puts 10\n") == TargetStatus.DRIFTED
+
+
+class TestCheckTemplate:
+    def test_check_template(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = compile_template(create_document(tmpdirname))
+
+            template.render()
+
+            assert check_template(template, jobs=2) == []
+
+            write_file(os.path.join(tmpdirname, "b.rb"), "puts 9\n")
+            os.remove(os.path.join(tmpdirname, "d.rb"))
+
+            drifts = check_template(template, jobs=2)
+
+            assert drifts == [
+                (os.path.join(tmpdirname, "b.rb"), TargetStatus.DRIFTED),
+                (os.path.join(tmpdirname, "d.rb"), TargetStatus.MISSING),
+            ]
+
+    def test_check_template_does_not_write(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = compile_template(create_document(tmpdirname))
+
+            assert len(check_template(template)) == 4
+            assert os.listdir(tmpdirname) == ["index.md"]
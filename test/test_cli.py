@@ -1,8 +1,12 @@
-from argparse import Namespace
+import json
+import os
+
+import pytest
 from unittest.mock import patch
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 
-from tangle.cli import Cli
+from test import read_file, write_file
+from tangle.cli import Cli, create_args_parser
 
 
 class TestCli:
@@ -19,8 +23,10 @@ class TestCli:
             with NamedTemporaryFile("r") as alacritty_file:
                 with NamedTemporaryFile("w+") as sample_file:
                     with patch(
-                        "argparse.ArgumentParser.parse_args",
-                        return_value=Namespace(file=sample_file.name),
+                        "argparse.ArgumentParser.parse_intermixed_args",
+                        return_value=create_args_parser().parse_args(
+                            [sample_file.name]
+                        ),
                     ):
                         sample = self.create_sample(
                             bashrc_file.name, alacritty_file.name
@@ -40,3 +46,194 @@ class TestCli:
                             alacritty_file.read()
                             == open("sample/alacritty.yml", "r").read()
                         )
+
+    def test_run_with_profiles(self):
+        with NamedTemporaryFile("r") as bashrc_file:
+            with NamedTemporaryFile("r") as alacritty_file:
+                with NamedTemporaryFile("w+") as profiles_file:
+                    profiles = {
+                        "host": {
+                            "BASHRC_PATH": bashrc_file.name,
+                            "ALACRITTY_PATH": alacritty_file.name,
+                        }
+                    }
+
+                    json.dump(profiles, profiles_file)
+                    profiles_file.seek(0)
+
+                    with patch(
+                        "argparse.ArgumentParser.parse_intermixed_args",
+                        return_value=create_args_parser().parse_args(
+                            ["--profiles", profiles_file.name, "sample/dotfile.md"]
+                        ),
+                    ):
+                        cli = Cli()
+
+                        cli.run()
+
+                        assert (
+                            bashrc_file.read() == open("sample/bashrc.sh", "r").read()
+                        )
+                        assert (
+                            alacritty_file.read()
+                            == open("sample/alacritty.yml", "r").read()
+                        )
+
+    def test_run_with_shard(self):
+        with NamedTemporaryFile("r") as bashrc_file:
+            with NamedTemporaryFile("r") as alacritty_file:
+                with NamedTemporaryFile("w+") as sample_file:
+                    with patch(
+                        "argparse.ArgumentParser.parse_intermixed_args",
+                        return_value=create_args_parser().parse_args(
+                            ["--shard", "1/1", sample_file.name]
+                        ),
+                    ):
+                        sample = self.create_sample(
+                            bashrc_file.name, alacritty_file.name
+                        )
+
+                        sample_file.write(sample)
+                        sample_file.seek(0)
+
+                        cli = Cli()
+
+                        assert cli.run() == 0
+                        assert (
+                            bashrc_file.read() == open("sample/bashrc.sh", "r").read()
+                        )
+
+    def test_run_with_check(self):
+        with NamedTemporaryFile("r") as bashrc_file:
+            with NamedTemporaryFile("r") as alacritty_file:
+                with NamedTemporaryFile("w+") as sample_file:
+                    with patch(
+                        "argparse.ArgumentParser.parse_intermixed_args",
+                        return_value=create_args_parser().parse_args(
+                            ["--check", sample_file.name]
+                        ),
+                    ):
+                        sample = self.create_sample(
+                            bashrc_file.name, alacritty_file.name
+                        )
+
+                        sample_file.write(sample)
+                        sample_file.seek(0)
+
+                        cli = Cli()
+
+                        assert cli.run() == 1
+                        assert bashrc_file.read() == ""
+
+    def test_run_with_check_up_to_date(self):
+        with NamedTemporaryFile("r") as bashrc_file:
+            with NamedTemporaryFile("r") as alacritty_file:
+                with NamedTemporaryFile("w+") as sample_file:
+                    sample = self.create_sample(bashrc_file.name, alacritty_file.name)
+
+                    sample_file.write(sample)
+                    sample_file.seek(0)
+
+                    with patch("sys.argv", ["tangle", sample_file.name]):
+                        assert Cli().run() == 0
+
+                    with patch("sys.argv", ["tangle", "--check", sample_file.name]):
+                        assert Cli().run() == 0
+
+    def test_run_compile(self):
+        with NamedTemporaryFile("r") as bashrc_file:
+            with NamedTemporaryFile("r") as alacritty_file:
+                with TemporaryDirectory() as tmpdirname:
+                    sample_path = os.path.join(tmpdirname, "dotfile.md")
+                    compiled_path = os.path.join(tmpdirname, "dotfile.tangle")
+
+                    with open(sample_path, "w+") as f:
+                        f.write(
+                            self.create_sample(bashrc_file.name, alacritty_file.name)
+                        )
+
+                    with patch("sys.argv", ["tangle", "compile", sample_path]):
+                        assert Cli().run() == 0
+
+                    with patch("sys.argv", ["tangle", compiled_path]):
+                        assert Cli().run() == 0
+
+                    assert bashrc_file.read() == open("sample/bashrc.sh", "r").read()
+                    assert (
+                        alacritty_file.read()
+                        == open("sample/alacritty.yml", "r").read()
+                    )
+
+    def test_run_compile_to_another_directory(self):
+        with TemporaryDirectory() as tmpdirname:
+            notes_path = os.path.join(tmpdirname, "notes")
+            compiled_path = os.path.join(tmpdirname, "out", "a.tangle")
+
+            os.makedirs(notes_path)
+            write_file(
+                os.path.join(notes_path, "a.md"),
+                "[sub](sub.md)\n```ruby > x.rb\nputs 'x'\n```",
+            )
+            write_file(
+                os.path.join(notes_path, "sub.md"), "```ruby > sub.rb\nputs 'sub'\n```"
+            )
+
+            with patch(
+                "sys.argv",
+                [
+                    "tangle",
+                    "compile",
+                    os.path.join(notes_path, "a.md"),
+                    "-o",
+                    compiled_path,
+                ],
+            ):
+                assert Cli().run() == 0
+
+            with patch("sys.argv", ["tangle", compiled_path]):
+                assert Cli().run() == 0
+
+            assert read_file(os.path.join(notes_path, "x.rb")) == "puts 'x'\n"
+            assert read_file(os.path.join(notes_path, "sub.rb")) == "puts 'sub'\n"
+            assert not os.path.exists(os.path.join(tmpdirname, "out", "x.rb"))
+
+    def test_run_compile_with_profiles(self):
+        with TemporaryDirectory() as tmpdirname:
+            source_path = os.path.join(tmpdirname, "a.md")
+            profile_path = os.path.join(tmpdirname, "tangle.prof")
+            memory_path = os.path.join(tmpdirname, "memory.txt")
+
+            write_file(source_path, "```ruby > x.rb\nputs 'x'\n```")
+
+            with patch(
+                "sys.argv",
+                [
+                    "tangle",
+                    "compile",
+                    "--profile",
+                    profile_path,
+                    "--trace-memory",
+                    memory_path,
+                    source_path,
+                ],
+            ):
+                assert Cli().run() == 0
+
+            assert os.path.exists(os.path.join(tmpdirname, "a.tangle"))
+            assert os.path.exists(profile_path)
+            assert "after compile: current=" in read_file(memory_path)
+
+    def test_run_file_named_compile(self):
+        with patch("sys.argv", ["tangle", "compile"]):
+            cli = Cli()
+
+            with patch.object(cli, "_eval_file") as eval_file:
+                assert cli.run() == 0
+
+            eval_file.assert_called_once()
+            assert cli._args.file == "compile"
+
+    def test_run_output_without_compile(self):
+        with patch("sys.argv", ["tangle", "-o", "dotfile.tangle", "dotfile.md"]):
+            with pytest.raises(SystemExit):
+                Cli().run()
@@ -8,6 +8,10 @@ from tangle.parser import (
     StringParser,
     TextNode,
     LinkNode,
+    CompiledParser,
+    compile_document,
+    document_link_path,
+    source_fingerprint,
 )
 
 
@@ -121,7 +125,7 @@ class TestStringParser:
             assert node.count() == 0
 
     def test_parse_links(self):
-        parser = StringParser("[link](https://example.com)")
+        parser = StringParser("[link](notes/example.md)")
 
         node = parser.parse()
 
@@ -133,11 +137,87 @@ class TestStringParser:
 
         assert link.node_type() == AstNodeType.LINK
         assert link_text.value == "link"
-        assert link_href.value == "https://example.com"
+        assert link_href.value == "notes/example.md"
+
+    def test_parse_links_drops_non_document_links(self):
+        parser = StringParser(
+            "[url](https://example.com/index.md)\n"
+            "[mail](mailto:user@example.com)\n"
+            "[anchor](#section)\n"
+            "[file](script.rb)\n"
+            "![image](image.md)\n"
+            "[section](example.md#section)"
+        )
+
+        node = parser.parse()
+
+        assert len(node.links) == 1
+        assert node.links[0].path.value == "example.md"
 
     def test_parse_invalid_link(self):
-        parser = StringParser("[link](https://example.com")
+        parser = StringParser("[link](example.md")
 
         node = parser.parse()
 
         assert len(node.links) == 0
+
+
+class TestDocumentLinkPath:
+    def test_document_link_path(self):
+        assert document_link_path("example.md") == "example.md"
+        assert document_link_path("~/notes/example.md?raw#top") == "~/notes/example.md"
+        assert document_link_path("https://example.com/example.md") is None
+        assert document_link_path("#example.md") is None
+        assert document_link_path("example.png") is None
+        assert document_link_path("") is None
+
+
+class TestCompiledParser:
+    @pytest.fixture
+    def document(self):
+        return (
+            "# Animals\n[dog](dog.md)\n"
+            "```ruby > ~/animal.rb\nclass Animal\nend\n```\n"
+            "```> ~/cat.rb\nclass Cat < Animal\nend\n```"
+        )
+
+    def test_compile_document_roundtrip(self, document):
+        expected = StringParser(document).parse()
+        node = CompiledParser(compile_document(document)).parse()
+
+        assert node.count() == expected.count()
+
+        for i in range(node.count()):
+            code_block = cast(CodeBlockNode, node.get(i))
+            expected_block = cast(CodeBlockNode, expected.get(i))
+
+            assert code_block.info.value == expected_block.info.value
+            assert code_block.content.value == expected_block.content.value
+            assert code_block.operator.operator == expected_block.operator.operator
+            assert (
+                cast(TextNode, code_block.operator.operand).value
+                == cast(TextNode, expected_block.operator.operand).value
+            )
+
+        assert [link.path.value for link in node.links] == ["dog.md"]
+
+    def test_compile_document_fingerprint(self, document):
+        header = compile_document(document).split("\n", 1)[0]
+
+        assert source_fingerprint(document) in header
+
+    def test_parse_invalid_compiled_document(self):
+        with pytest.raises(ValueError):
+            CompiledParser("# Animals").parse()
+
+    def test_parse_unsupported_version(self):
+        with pytest.raises(ValueError):
+            CompiledParser('{"version": 0}\n').parse()
+
+    def test_parse_compiled_document_without_tables(self):
+        with pytest.raises(ValueError):
+            CompiledParser('{"version": 1, "blocks": []}\n').parse()
+
+    def test_parse_compiled_document_with_invalid_tables(self):
+        with pytest.raises(ValueError):
+            CompiledParser('{"version": 1, "blocks": [[0]], "links": []}\n').parse()
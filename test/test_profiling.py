@@ -0,0 +1,97 @@
+import os
+import pstats
+import tempfile
+import tracemalloc
+
+from unittest.mock import patch
+
+from tangle.profiling import mark_phase, profile_cpu, snapshot_phase, trace_memory
+
+
+def work():
+    return sum(len(str(i)) for i in range(10000))
+
+
+class TestProfileCpu:
+    def test_profile_cpu_writes_pstats(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "tangle.prof")
+
+            with profile_cpu(path):
+                work()
+
+            stats = pstats.Stats(path)
+
+            assert any(name == "work" for _, _, name in stats.stats)
+
+    def test_profile_cpu_writes_collapsed_stacks(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "tangle.folded")
+
+            with profile_cpu(path):
+                work()
+
+            with open(path, "r") as f:
+                lines = f.read().splitlines()
+
+            assert lines
+            assert any(":work" in line for line in lines)
+
+            for line in lines:
+                stack, value = line.rsplit(" ", 1)
+
+                assert stack
+                assert int(value) > 0
+
+    def test_profile_cpu_without_path(self):
+        with profile_cpu(None):
+            work()
+
+
+class TestTraceMemory:
+    def test_trace_memory_records_phases(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "memory.txt")
+
+            with trace_memory(path):
+                mark_phase("read", "document.md")
+                snapshot_phase("parse")
+
+            with open(path, "r") as f:
+                report = f.read()
+
+            assert "after read (document.md): current=" in report
+            assert "after parse: current=" in report
+
+    def test_mark_phase_does_not_take_snapshots(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "memory.txt")
+
+            with trace_memory(path):
+                with patch(
+                    "tracemalloc.take_snapshot", wraps=tracemalloc.take_snapshot
+                ) as take_snapshot:
+                    for i in range(100):
+                        mark_phase("read", "{}.md".format(i))
+
+                    snapshot_phase("evaluate")
+
+                    assert take_snapshot.call_count == 1
+
+    def test_snapshot_phase_is_not_profiled(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            profile_path = os.path.join(tmpdirname, "tangle.prof")
+
+            with trace_memory(os.path.join(tmpdirname, "memory.txt")):
+                with profile_cpu(profile_path):
+                    work()
+                    snapshot_phase("parse")
+
+            stats = pstats.Stats(profile_path)
+
+            assert any(name == "work" for _, _, name in stats.stats)
+            assert not any(name == "take_snapshot" for _, _, name in stats.stats)
+
+    def test_mark_phase_without_tracer(self):
+        mark_phase("read")
+        snapshot_phase("evaluate")
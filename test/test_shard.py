@@ -0,0 +1,80 @@
+import os
+import pytest
+import tempfile
+
+from test import read_file, write_file
+from tangle.shard import ShardPlan, document_key, parse_shard, shard_of
+from tangle.tangle import FilePath
+from tangle.template import compile_template
+
+
+def create_tree(dir, count, target="{}.rb"):
+    links = "\n".join("[doc{}](doc{}.md)".format(i, i) for i in range(count))
+
+    write_file(os.path.join(dir, "index.md"), links)
+
+    for i in range(count):
+        write_file(
+            os.path.join(dir, "doc{}.md".format(i)),
+            "```ruby > {}\nputs {}\n```".format(target.format(i), i),
+        )
+
+    return os.path.join(dir, "index.md")
+
+
+class TestParseShard:
+    def test_parse_shard(self):
+        assert parse_shard("2/4") == (2, 4)
+
+    @pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "1", "a/b", "1/2/3"])
+    def test_parse_shard_raises_error_with_invalid_value(self, value):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+class TestShardOf:
+    def test_document_key(self):
+        root_path = FilePath("/notes/index.md")
+
+        assert document_key(root_path, FilePath("/notes/a/b.md")) == "a/b.md"
+
+    def test_shard_of_is_stable(self):
+        assert shard_of("a/b.md", 4) == shard_of("a/b.md", 4)
+        assert 1 <= shard_of("a/b.md", 4) <= 4
+
+
+class TestShardPlan:
+    def test_shards_partition_documents(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = compile_template(create_tree(tmpdirname, 20))
+            plan = ShardPlan(template, 3)
+
+            documents = [plan.documents(index) for index in range(1, 4)]
+            paths = [str(document.path) for shard in documents for document in shard]
+
+            assert len(paths) == len(template.documents)
+            assert set(paths) == {str(d.path) for d in template.documents}
+            assert plan.conflicts() == {}
+
+    def test_shard_renders_its_documents(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = compile_template(create_tree(tmpdirname, 10))
+            plan = ShardPlan(template, 2)
+
+            for index in [1, 2]:
+                plan.template(index).render()
+
+            for i in range(10):
+                path = os.path.join(tmpdirname, "{}.rb".format(i))
+
+                assert read_file(path) == "puts {}\n".format(i)
+
+    def test_conflicts(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = compile_template(create_tree(tmpdirname, 20, "shared.rb"))
+            plan = ShardPlan(template, 2)
+
+            conflicts = plan.conflicts()
+
+            assert list(conflicts.keys()) == [os.path.join(tmpdirname, "shared.rb")]
+            assert conflicts[os.path.join(tmpdirname, "shared.rb")] == {1, 2}
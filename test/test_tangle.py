@@ -2,9 +2,12 @@ import os
 from unittest.mock import MagicMock, mock_open, patch
 import pytest
 import tempfile
+import weakref
 
+from tangle.cache import document_cache, load_document
 from tangle.parser import (
     CodeBlockNode,
+    compile_document,
     DocumentNode,
     StringParser,
     TextNode,
@@ -16,6 +19,7 @@ from tangle.tangle import (
     FileInterpreter,
     EvalVisitor,
     FilePath,
+    Scheduler,
     write_to_file,
 )
 
@@ -113,6 +117,13 @@ class TestFilePath:
 
             assert file_path.file_or_dir_exists() == False
 
+    def test_is_markdown(self):
+        with patch("os.path.isfile") as isfile:
+            assert FilePath("~/randomfile.md").is_markdown() == True
+            assert FilePath("~/randomfile.rb").is_markdown() == False
+
+            isfile.assert_not_called()
+
     def test_dirname(self):
         file_path = FilePath("~/randomfile")
 
@@ -138,6 +149,55 @@ class TestBaseInterpreter:
         document.accept.assert_called_with(visitor)
 
 
+class TestScheduler:
+    def test_run_schedules_documents_once(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            visited = []
+
+            def create_visitor(path, scheduler):
+                visited.append(path.path)
+
+                return EvalVisitor(path, scheduler)
+
+            with open(os.path.join(tmpdirname, "randomfile.md"), "w+") as f:
+                f.write("[randomfile](randomfile.md)")
+
+            scheduler = Scheduler(create_visitor)
+
+            scheduler.schedule(FilePath(os.path.join(tmpdirname, "randomfile.md")))
+            scheduler.run()
+
+            assert visited == [os.path.join(tmpdirname, "randomfile.md")]
+
+    def test_run_releases_documents_before_loading_the_next(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            documents = []
+            alive = []
+
+            def load(path, create_parser, cache):
+                alive.append(sum(1 for document in documents if document()))
+
+                document = load_document(path, create_parser, cache)
+                documents.append(weakref.ref(document))
+
+                return document
+
+            with open(os.path.join(tmpdirname, "randomfile.md"), "w+") as f:
+                f.write(create_randomfile_content_with_link(tmpdirname))
+
+            with open(os.path.join(tmpdirname, "randomfile2.md"), "w+") as f:
+                f.write(create_randomfile_content(tmpdirname, "randomfile2.rb"))
+
+            scheduler = Scheduler(EvalVisitor)
+
+            scheduler.schedule(FilePath(os.path.join(tmpdirname, "randomfile.md")))
+
+            with patch("tangle.tangle.load_document", side_effect=load):
+                scheduler.run()
+
+            assert alive == [0, 0]
+
+
 class TestFileInterpreter:
     def test_eval(self):
         with tempfile.TemporaryDirectory() as tmpdirname:
@@ -158,3 +218,136 @@ class TestFileInterpreter:
 
             with open(os.path.join(tmpdirname, "randomfile2.rb"), "r") as f:
                 assert f.read() == "puts 'Hello World'\n"
+
+    def test_eval_compiled(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            interpreter = FileInterpreter(
+                os.path.join(tmpdirname, "randomfile.tangle"), format="compiled"
+            )
+
+            with open(os.path.join(tmpdirname, "randomfile.tangle"), "w+") as f:
+                f.write(
+                    compile_document(create_randomfile_content_with_link(tmpdirname))
+                )
+
+            with open(os.path.join(tmpdirname, "randomfile2.md"), "w+") as f:
+                f.write(create_randomfile_content(tmpdirname, "randomfile2.rb"))
+
+            interpreter.eval()
+
+            with open(os.path.join(tmpdirname, "randomfile.rb"), "r") as f:
+                assert f.read() == "puts 'Hello World'\n"
+
+            with open(os.path.join(tmpdirname, "randomfile2.rb"), "r") as f:
+                assert f.read() == "puts 'Hello World'\n"
+
+    def test_eval_compiled_to_another_directory(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            notes_path = os.path.join(tmpdirname, "notes")
+            out_path = os.path.join(tmpdirname, "out")
+            source = "[sub](sub.md)\n```ruby > x.rb\nputs 'x'\n```"
+
+            os.makedirs(notes_path)
+            os.makedirs(out_path)
+
+            with open(os.path.join(notes_path, "a.md"), "w+") as f:
+                f.write(source)
+
+            with open(os.path.join(notes_path, "sub.md"), "w+") as f:
+                f.write("```ruby > sub.rb\nputs 'sub'\n```")
+
+            with open(os.path.join(out_path, "a.tangle"), "w+") as f:
+                f.write(compile_document(source, os.path.join("..", "notes", "a.md")))
+
+            FileInterpreter(
+                os.path.join(out_path, "a.tangle"), format="compiled"
+            ).eval()
+
+            assert os.listdir(out_path) == ["a.tangle"]
+
+            with open(os.path.join(notes_path, "x.rb"), "r") as f:
+                assert f.read() == "puts 'x'\n"
+
+            with open(os.path.join(notes_path, "sub.rb"), "r") as f:
+                assert f.read() == "puts 'sub'\n"
+
+    def test_eval_raises_error_with_stale_compiled_document(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = os.path.join(tmpdirname, "randomfile.md")
+            compiled_path = os.path.join(tmpdirname, "randomfile.tangle")
+
+            with open(source_path, "w+") as f:
+                f.write(create_randomfile_content(tmpdirname, "randomfile.rb"))
+
+            with open(compiled_path, "w+") as f:
+                f.write(
+                    compile_document(
+                        create_randomfile_content(tmpdirname, "randomfile2.rb"),
+                        "randomfile.md",
+                    )
+                )
+
+            interpreter = FileInterpreter(compiled_path, format="compiled")
+
+            with pytest.raises(ValueError):
+                interpreter.eval()
+
+            assert not os.path.exists(os.path.join(tmpdirname, "randomfile2.rb"))
+
+    def test_eval_does_not_retain_documents(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            with open(os.path.join(tmpdirname, "randomfile.md"), "w+") as f:
+                f.write(create_randomfile_content_with_link(tmpdirname))
+
+            with open(os.path.join(tmpdirname, "randomfile2.md"), "w+") as f:
+                f.write(create_randomfile_content(tmpdirname, "randomfile2.rb"))
+
+            FileInterpreter(os.path.join(tmpdirname, "randomfile.md")).eval()
+
+            assert document_cache().count() == 0
+
+    def test_init_raises_error_with_unsupported_format(self):
+        with pytest.raises(ValueError):
+            FileInterpreter("randomfile.md", format="html")
+
+    def test_eval_stats_linked_documents_once(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            linked_path = os.path.join(tmpdirname, "randomfile2.md")
+
+            with open(os.path.join(tmpdirname, "randomfile.md"), "w+") as f:
+                f.write(create_randomfile_content_with_link(tmpdirname))
+
+            with open(linked_path, "w+") as f:
+                f.write(create_randomfile_content(tmpdirname, "randomfile2.rb"))
+
+            interpreter = FileInterpreter(os.path.join(tmpdirname, "randomfile.md"))
+
+            with patch("os.stat", wraps=os.stat) as stat:
+                interpreter.eval()
+
+                calls = [c for c in stat.call_args_list if c.args[0] == linked_path]
+
+                assert len(calls) == 1
+
+    def test_eval_raises_error_with_missing_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            interpreter = FileInterpreter(os.path.join(tmpdirname, "randomfile.md"))
+
+            with pytest.raises(FileNotFoundError):
+                interpreter.eval()
+
+    def test_eval_long_chain_of_links(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            count = 2000
+
+            for i in range(count):
+                with open(os.path.join(tmpdirname, "{}.md".format(i)), "w+") as f:
+                    f.write("[next]({}.md)\n".format(i + 1))
+                    f.write(create_randomfile_content(tmpdirname, "{}.rb".format(i)))
+
+            interpreter = FileInterpreter(os.path.join(tmpdirname, "0.md"))
+
+            interpreter.eval()
+
+            with open(os.path.join(tmpdirname, "{}.rb".format(count - 1)), "r") as f:
+                assert f.read() == "puts 'Hello World'\n"
@@ -0,0 +1,150 @@
+import json
+import os
+import pytest
+import tempfile
+
+from test import read_file, write_file
+from tangle.template import (
+    TemplateString,
+    compile_template,
+    load_profiles,
+    profile_commands,
+    render_profiles,
+)
+
+
+class TestTemplateString:
+    def test_render_without_placeholders(self):
+        assert TemplateString("content").render({"NAME": "value"}) == "content"
+
+    def test_render_replaces_placeholders(self):
+        template_string = TemplateString("[[HOME]]/.bashrc for [[USER]]")
+
+        rendered = template_string.render({"HOME": "/home/user", "USER": "user"})
+
+        assert rendered == "/home/user/.bashrc for user"
+
+    def test_render_without_variables_keeps_source(self):
+        assert TemplateString("[[HOME]]").render() == "[[HOME]]"
+
+    def test_render_ignores_non_placeholders(self):
+        template_string = TemplateString("if [[ -n $SSH ]]; then")
+
+        assert template_string.render({}) == "if [[ -n $SSH ]]; then"
+
+    def test_render_ignores_lower_case_names(self):
+        template_string = TemplateString("[[bin]]\nname = '[[NAME]]'")
+
+        assert template_string.render({"NAME": "tangle"}) == "[[bin]]\nname = 'tangle'"
+
+    def test_render_raises_error_with_undefined_variable(self):
+        with pytest.raises(ValueError):
+            TemplateString("[[HOME]]").render({})
+
+
+class TestTemplate:
+    def test_compile_follows_links_once(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            write_file(
+                os.path.join(tmpdirname, "a.md"),
+                "[b](b.md)\n```ruby > a.rb\nputs 'a'\n```",
+            )
+            write_file(
+                os.path.join(tmpdirname, "b.md"),
+                "[a](a.md)\n```ruby > b.rb\nputs 'b'\n```",
+            )
+
+            template = compile_template(os.path.join(tmpdirname, "a.md"))
+
+            assert len(template.documents) == 2
+            assert len(template.documents[0].blocks) == 1
+            assert len(template.documents[1].blocks) == 1
+
+    def test_render_profiles(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            write_file(
+                os.path.join(tmpdirname, "a.md"),
+                "```ruby > [[DIR]]/hello.rb\nputs '[[NAME]]'\n```",
+            )
+
+            profiles = {
+                name: {"DIR": os.path.join(tmpdirname, name), "NAME": name}
+                for name in ["first", "second", "third"]
+            }
+
+            template = compile_template(os.path.join(tmpdirname, "a.md"))
+
+            render_profiles(template, profiles, jobs=2)
+
+            for name in profiles:
+                path = os.path.join(tmpdirname, name, "hello.rb")
+
+                assert read_file(path) == "puts '{}'\n".format(name)
+
+    def test_render_profiles_names_profile_with_undefined_variable(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "a.md")
+
+            write_file(path, "```ruby > [[DIR]]/hello.rb\nputs '[[NAME]]'\n```")
+
+            template = compile_template(path)
+            profiles = {
+                "dog": {"DIR": tmpdirname, "NAME": "dog"},
+                "cat": {"DIR": tmpdirname},
+            }
+
+            with pytest.raises(ValueError, match="Profile cat cannot render .*a.md"):
+                render_profiles(template, profiles)
+
+            assert os.listdir(tmpdirname) == ["a.md"]
+
+    def test_render_profiles_rejects_shared_targets(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            write_file(
+                os.path.join(tmpdirname, "a.md"),
+                "```ruby > shared.rb\nputs '[[NAME]]'\n```",
+            )
+
+            profiles = {name: {"NAME": name} for name in ["first", "second"]}
+            template = compile_template(os.path.join(tmpdirname, "a.md"))
+
+            with pytest.raises(ValueError):
+                render_profiles(template, profiles, jobs=2)
+
+            assert not os.path.exists(os.path.join(tmpdirname, "shared.rb"))
+
+    def test_render_profiles_writes_identical_shared_targets_once(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            write_file(
+                os.path.join(tmpdirname, "a.md"),
+                "```ruby > shared.rb\nputs 'shared'\n```\n"
+                "```ruby > [[NAME]].rb\nputs '[[NAME]]'\n```",
+            )
+
+            profiles = {name: {"NAME": name} for name in ["first", "second"]}
+            template = compile_template(os.path.join(tmpdirname, "a.md"))
+            commands = profile_commands(template, profiles)
+
+            assert [len(rendered) for rendered in commands] == [2, 1]
+
+            render_profiles(template, profiles, jobs=2)
+
+            assert read_file(os.path.join(tmpdirname, "shared.rb")) == "puts 'shared'\n"
+            assert read_file(os.path.join(tmpdirname, "second.rb")) == "puts 'second'\n"
+
+
+class TestLoadProfiles:
+    def test_load_profiles(self):
+        with tempfile.NamedTemporaryFile("w+") as f:
+            json.dump({"host": {"HOME": "/home/user"}}, f)
+            f.seek(0)
+
+            assert load_profiles(f.name) == {"host": {"HOME": "/home/user"}}
+
+    def test_load_profiles_raises_error_with_invalid_values(self):
+        with tempfile.NamedTemporaryFile("w+") as f:
+            json.dump({"host": {"HOME": 1}}, f)
+            f.seek(0)
+
+            with pytest.raises(ValueError):
+                load_profiles(f.name)